@@ -1,6 +1,7 @@
-from pydartpub.api.client import PubRepositoryClient
-from pydartpub.structures.dependency import PubDependency, PubHostedDependency, PubExternalHostedDependency, PubGitDependency, PubPathDependency, PubSdkDependency
+from pydartpub.api.client import PubRepositoryCursor
+from pydartpub.structures.dependency import PubDependency, PubHostedDependency, PubExternalHostedDependency, PubGitDependency, PubPathDependency, PubSdkDependency, version_constraint_in_str, parse_version_constraint
 from pydartpub.structures.pubspec import Pubspec, PubspecScreenshot, parse_from_dict
+from pydartpub.structures.writer import write_pubspec_yaml, dump_pubspec_yaml, write_pubspec_json, dump_pubspec_json, diff_pubspec_constraints, apply_text_patches, PubspecTextPatch, PubspecConstraintDiff
 
 PYDARTPUB_VERSION: str = "1.0.0-alpha.1"
 """Version of this package"""
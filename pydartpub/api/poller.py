@@ -0,0 +1,361 @@
+from concurrent.futures import Future, InvalidStateError
+import threading
+import time
+from typing import Callable, Optional, Union
+from versions import Version, parse_version
+
+from .cmd.documentations import PubApiClientDocumentation
+from .cmd.factory import ResponseError
+from .result.documentations import DocumentStatus, PubVersionDocumentation, parse_documentation
+
+DocumentationCallback = Callable[[PubVersionDocumentation], None]
+
+class PollBudgetExhaustedError(RuntimeError):
+    """
+    Raised into pending futures when poller used up all request budget
+    before documentation build finished
+    """
+    def __init__(self, package_name: str, version: str):
+        super().__init__("Request budget exhausted before documentation of {} {} finished".format(package_name, version))
+        self.__package_name = package_name
+        self.__version = version
+
+    @property
+    def package_name(self) -> str:
+        return self.__package_name
+
+    @property
+    def version(self) -> str:
+        return self.__version
+
+class DocumentationNotFoundError(LookupError):
+    """
+    Raised into pending futures when the package or version is still not found
+    in documentation API after too many polls
+    """
+    def __init__(self, package_name: str, version: str):
+        super().__init__("Documentation of {} {} not found".format(package_name, version))
+        self.__package_name = package_name
+        self.__version = version
+
+    @property
+    def package_name(self) -> str:
+        return self.__package_name
+
+    @property
+    def version(self) -> str:
+        return self.__version
+
+class _PendingDocumentation:
+    def __init__(self, interval: float, next_poll: float):
+        self.future: Future[PubVersionDocumentation] = Future()
+        self.interval = interval
+        self.next_poll = next_poll
+        self.missing_polls = 0
+
+def _complete(future: Future, outcome: Union[PubVersionDocumentation, BaseException]):
+    try:
+        if isinstance(outcome, BaseException):
+            future.set_exception(outcome)
+        else:
+            future.set_result(outcome)
+    except InvalidStateError:
+        # Cancelled by caller during polling
+        pass
+
+class DocumentationPoller:
+    """
+    Wait for pending documentation build of multiple packages' versions.
+
+    All tracked versions under the same package are resolved from a single request
+    of documentation API, and each version has its own backoff interval which grows
+    every time it still pending. A package will only be requested again when any of
+    its tracked versions is due, and requests are throttled by a token bucket.
+
+    Connection errors and error responses are treated as pending, while any other
+    error from the request (e.g. malformed response) completes all tracked futures
+    of that package with the exception.
+
+    `track` can be called from any thread while `run` is polling in another thread.
+    """
+
+    def __init__(
+            self,
+            client: PubApiClientDocumentation,
+            request_budget: Optional[int] = None,
+            initial_interval: float = 5.0,
+            max_interval: float = 300.0,
+            backoff_factor: float = 2.0,
+            rate_limit: Optional[float] = 10.0,
+            rate_burst: int = 10,
+            max_missing_polls: Optional[int] = 10,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep
+        ) -> None:
+        """
+        Create a documentation poller.
+
+        :param client: Documentation API client uses for polling
+        :param request_budget: Maximum requests can be made by this poller, or `None` for unlimited
+        :param initial_interval: Seconds to wait before first poll of newly tracked version
+        :param max_interval: Upper limit of seconds between two polls of the same version
+        :param backoff_factor: Multiplier applies to interval when version still pending
+        :param rate_limit: Maximum requests per second in average, or `None` for unlimited
+        :param rate_burst: Maximum requests can be sent at once when `rate_limit` applied
+        :param max_missing_polls: Consecutive polls which package responded 404 or version is absent
+                                  before failing with `DocumentationNotFoundError`, or `None` for unlimited
+        :param clock: Monotonic clock in seconds
+        :param sleep: Function uses for waiting in `run`
+        """
+        if request_budget is not None and request_budget < 0:
+            raise ValueError("Request budget must not be negative")
+
+        if initial_interval <= 0 or max_interval < initial_interval:
+            raise ValueError("Invalid polling interval")
+
+        if backoff_factor < 1:
+            raise ValueError("Backoff factor must be at least 1")
+
+        if rate_limit is not None and (rate_limit <= 0 or rate_burst < 1):
+            raise ValueError("Invalid rate limit")
+
+        if max_missing_polls is not None and max_missing_polls < 1:
+            raise ValueError("Maximum missing polls must be positive")
+
+        self.__client = client
+        self.__request_budget = request_budget
+        self.__initial_interval = initial_interval
+        self.__max_interval = max_interval
+        self.__backoff_factor = backoff_factor
+        self.__rate_limit = rate_limit
+        self.__rate_burst = rate_burst
+        self.__max_missing_polls = max_missing_polls
+        self.__clock = clock
+        self.__sleep = sleep
+        self.__requests_made = 0
+        self.__tokens = float(rate_burst)
+        self.__tokens_time = clock()
+        self.__pending: dict[str, dict[str, _PendingDocumentation]] = {}
+        self.__lock = threading.RLock()
+
+    @property
+    def requests_made(self) -> int:
+        """
+        Number of requests made by this poller
+        """
+        return self.__requests_made
+
+    @property
+    def remaining_budget(self) -> Optional[int]:
+        """
+        Number of requests still allowed, or `None` if unlimited
+        """
+        if self.__request_budget is None:
+            return None
+
+        return self.__request_budget - self.__requests_made
+
+    @property
+    def pending_count(self) -> int:
+        """
+        Number of tracked versions which documentation build does not finished yet
+        """
+        with self.__lock:
+            return sum(len(v) for v in self.__pending.values())
+
+    def track(
+            self,
+            package_name: str,
+            version: Union[Version, str],
+            callback: Optional[DocumentationCallback] = None
+        ) -> Future[PubVersionDocumentation]:
+        """
+        Track documentation build of given package's version.
+
+        Tracking the same version again returns the same future unless it has been cancelled.
+
+        :param package_name: Name of the package
+        :param version: Version of the package
+        :param callback: Call with documentation once it reaches `SUCCESS` or `FAILED`, any exception raised from it will be logged and ignored
+
+        :return: Future which completes with documentation once it reaches `SUCCESS` or `FAILED`
+        """
+        ver_key = str(parse_version(version) if isinstance(version, str) else version)
+
+        with self.__lock:
+            versions = self.__pending.setdefault(package_name, {})
+            item = versions.get(ver_key)
+
+            if not item or item.future.cancelled():
+                item = _PendingDocumentation(self.__initial_interval, self.__clock() + self.__initial_interval)
+                versions[ver_key] = item
+
+        if callback:
+            def on_done(future: Future[PubVersionDocumentation]):
+                if not future.cancelled() and not future.exception():
+                    callback(future.result())
+
+            # Exceptions raised from done callbacks are logged and ignored by `Future`
+            item.future.add_done_callback(on_done)
+
+        return item.future
+
+    def __backoff(self, item: _PendingDocumentation, now: float):
+        item.interval = min(item.interval * self.__backoff_factor, self.__max_interval)
+        item.next_poll = now + item.interval
+
+    def __drop_cancelled(self):
+        for package_name in list(self.__pending):
+            versions = self.__pending[package_name]
+            for ver_key in [k for k, v in versions.items() if v.future.cancelled()]:
+                del versions[ver_key]
+
+            if not versions:
+                del self.__pending[package_name]
+
+    def __refill_tokens(self, now: float):
+        if self.__rate_limit is not None:
+            self.__tokens = min(float(self.__rate_burst), self.__tokens + (now - self.__tokens_time) * self.__rate_limit)
+        self.__tokens_time = now
+
+    def __token_wait(self, now: float) -> float:
+        if self.__rate_limit is None:
+            return 0.0
+
+        self.__refill_tokens(now)
+        # Tolerate float error after sleeping exactly the computed time
+        if self.__tokens >= 1 - 1e-9:
+            return 0.0
+        return (1 - self.__tokens) / self.__rate_limit
+
+    def __take_token(self, now: float) -> bool:
+        if self.__token_wait(now) > 0:
+            return False
+
+        if self.__rate_limit is not None:
+            self.__tokens = max(0.0, self.__tokens - 1)
+        return True
+
+    def __poll_package(self, package_name: str, now: float):
+        doc = None
+        error: Optional[Exception] = None
+        try:
+            doc = parse_documentation(self.__client.execute(package_name))
+        except Exception as e:
+            error = e
+
+        completions: list[tuple[Future, Union[PubVersionDocumentation, BaseException]]] = []
+        with self.__lock:
+            versions = self.__pending.get(package_name)
+            if not versions:
+                return
+
+            if error and not isinstance(error, OSError):
+                del self.__pending[package_name]
+                completions = [(item.future, error) for item in versions.values()]
+            else:
+                # Package may not be visible in documentation API yet
+                not_found = isinstance(error, ResponseError) and error.response_code == 404
+                statuses = {str(v.version): v for v in doc.versions} if doc else {}
+
+                for ver_key in list(versions):
+                    item = versions[ver_key]
+                    ver_doc = statuses.get(ver_key)
+
+                    if ver_doc and ver_doc.status != DocumentStatus.PENDING:
+                        del versions[ver_key]
+                        completions.append((item.future, ver_doc))
+                        continue
+
+                    if ver_doc:
+                        item.missing_polls = 0
+                    elif doc or not_found:
+                        item.missing_polls += 1
+                        if self.__max_missing_polls is not None and item.missing_polls >= self.__max_missing_polls:
+                            del versions[ver_key]
+                            completions.append((item.future, DocumentationNotFoundError(package_name, ver_key)))
+                            continue
+
+                    # Other connection errors are retried without counting
+                    self.__backoff(item, now)
+
+                if not versions:
+                    del self.__pending[package_name]
+
+        # Complete outside of lock since callbacks may track again
+        for (future, outcome) in completions:
+            _complete(future, outcome)
+
+    def next_poll_time(self) -> Optional[float]:
+        """
+        Clock time when the earliest pending version is due, or `None` if nothing pending
+        """
+        with self.__lock:
+            return min((item.next_poll for versions in self.__pending.values() for item in versions.values()), default=None)
+
+    def poll_once(self) -> int:
+        """
+        Request documentation of every package which has at least one due version,
+        as long as request budget and rate limit allowed.
+
+        :return: Number of requests made
+        """
+        with self.__lock:
+            self.__drop_cancelled()
+            now = self.__clock()
+            due_packages = sorted(
+                (min(item.next_poll for item in versions.values()), package_name)
+                for package_name, versions in self.__pending.items()
+            )
+
+            selected = []
+            for (due, package_name) in due_packages:
+                if due > now or self.remaining_budget == 0 or not self.__take_token(now):
+                    break
+
+                self.__requests_made += 1
+                selected.append(package_name)
+
+        for package_name in selected:
+            self.__poll_package(package_name, now)
+
+        return len(selected)
+
+    def run(self) -> None:
+        """
+        Keep polling until all tracked versions finished.
+
+        If request budget exhausted, all unfinished futures will be completed
+        with `PollBudgetExhaustedError`.
+        """
+        while True:
+            with self.__lock:
+                self.__drop_cancelled()
+                if not self.__pending:
+                    return
+
+                exhausted = []
+                if self.remaining_budget == 0:
+                    exhausted = [
+                        (item.future, PollBudgetExhaustedError(package_name, ver_key))
+                        for (package_name, versions) in self.__pending.items()
+                        for (ver_key, item) in versions.items()
+                    ]
+                    self.__pending.clear()
+
+            if exhausted:
+                for (future, error) in exhausted:
+                    _complete(future, error)
+                return
+
+            self.poll_once()
+
+            with self.__lock:
+                next_poll = self.next_poll_time()
+                if next_poll is None:
+                    continue
+
+                now = self.__clock()
+                wait = max(0.0, next_poll - now, self.__token_wait(now))
+
+            self.__sleep(wait)
@@ -1,7 +1,7 @@
 from enum import Enum
 from furl import furl
-from typing import Optional, Sequence
-from versions import Version
+from typing import Any, Optional, Sequence
+from versions import Version, parse_version
 
 from ..client import PubRepositoryCursor
 from ..url import get_repository_site
@@ -56,3 +56,45 @@ class PubDocumentation:
     @property
     def versions(self) -> Sequence[PubVersionDocumentation]:
         return self.__versions
+
+
+def parse_document_status(status: str) -> DocumentStatus:
+    """
+    Convert documentation status string returned from pub repository to `DocumentStatus`
+
+    Any unrecognized status will be treated as `DocumentStatus.PENDING`.
+
+    :param status: Status string from documentation API
+
+    :return: Corresponded `DocumentStatus`
+    """
+    match status.lower():
+        case "completed" | "success":
+            return DocumentStatus.SUCCESS
+        case "failed":
+            return DocumentStatus.FAILED
+        case _:
+            return DocumentStatus.PENDING
+
+def parse_documentation(json: dict[str, Any]) -> PubDocumentation:
+    """
+    Convert documentation API's JSON to `PubDocumentation` object
+
+    :param json: Documentation JSON of a package
+
+    :return: Documentation object
+    """
+    name: str = json["name"]
+    latest_stable = json.get("latestStableVersion")
+
+    versions = []
+    for v in json.get("versions", []):
+        status = parse_document_status(v.get("status", ""))
+        versions.append(PubVersionDocumentation(
+            name,
+            parse_version(v["version"]),
+            status,
+            status == DocumentStatus.SUCCESS and bool(v.get("hasDocumentation", False))
+        ))
+
+    return PubDocumentation(name, parse_version(latest_stable) if latest_stable else None, versions)
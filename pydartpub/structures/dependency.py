@@ -1,14 +1,73 @@
 import abc
 from frozendict import frozendict
+import re
 from typing import Optional, Any, Union
-from versions import VersionItem, parse_version_set
+from versions import Version, VersionItem, VersionPoint, VersionRange, VersionSet, parse_version_set
 
 VersionConstraint = Optional[VersionItem]
 RawDependencyDictValue = Union[str, dict[str, Any]]
 RawDependencyDict = dict[str, Optional[RawDependencyDictValue]]
 
-def __version_constraint_in_str(version: VersionConstraint) -> str:
-    return str(version) if version else "any"
+def version_constraint_in_str(version: VersionConstraint) -> str:
+    """
+    Render version constraint in pub's syntax, e.g. `^1.2.0` or `>=1.0.0 <1.5.0`
+
+    :param version: Version constraint, `None` means `any`
+
+    :return: Constraint string accepted by pub
+    """
+    match version:
+        case None:
+            return "any"
+        case Version():
+            return str(version)
+        case VersionPoint():
+            return str(version.version)
+        case VersionRange() if version.is_universal():
+            return "any"
+        case VersionRange():
+            if version.is_bounded() and version.include_min and not version.include_max \
+                    and parse_version_set("^{}".format(version.min)) == version:
+                return "^{}".format(version.min)
+
+            bounds = []
+            if version.is_left_bounded():
+                bounds.append("{}{}".format(">=" if version.include_min else ">", version.min))
+            if version.is_right_bounded():
+                bounds.append("{}{}".format("<=" if version.include_max else "<", version.max))
+            return " ".join(bounds)
+        case _:
+            raise ValueError("Version constraint can not be expressed in pub syntax - {}".format(version))
+
+def parse_version_constraint(constraint: Optional[str]) -> VersionSet:
+    """
+    Parse version constraint written in pub's syntax
+
+    :param constraint: Constraint string, empty or `None` means `any`
+
+    :return: Parsed version set
+    """
+    if not constraint or constraint.strip() == "any":
+        return parse_version_set("*")
+
+    # Pub separates bounds with spaces, while `versions` requires commas
+    return parse_version_set(", ".join(re.sub(r"([<>]=?)\s+", r"\1", constraint.strip()).split()))
+
+def as_version_set(version: VersionConstraint) -> VersionSet:
+    """
+    Convert version constraint to version set for comparison
+
+    :param version: Version constraint, `None` means `any`
+
+    :return: Version set of given constraint
+    """
+    match version:
+        case None:
+            return parse_version_set("*")
+        case Version():
+            return parse_version_set(str(version))
+        case _:
+            return version
 
 class PubDependency(abc.ABC):
     @abc.abstractmethod
@@ -29,7 +88,7 @@ class PubHostedDependency(PubDependency):
         return self.__version
 
     def generate_dict_value(self) -> RawDependencyDictValue:
-        return __version_constraint_in_str(self.__version)
+        return version_constraint_in_str(self.__version)
 
 class PubExternalHostedDependency(PubHostedDependency):
     def __init__(self, version: VersionConstraint, hosted: str, name: Optional[str] = None):
@@ -117,7 +176,7 @@ class PubSdkDependency(PubDependency):
     def generate_dict_value(self) -> RawDependencyDictValue:
         context = {"sdk": self.__sdk}
         if self.__version:
-            context["version"] = str(self.__version)
+            context["version"] = version_constraint_in_str(self.__version)
         
         return frozendict(context)
 
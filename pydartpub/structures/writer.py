@@ -0,0 +1,681 @@
+from collections.abc import Mapping
+import io
+import itertools
+import json
+import re
+from typing import Any, Iterable, Iterator, Optional, Sequence, TextIO, Union
+
+from .dependency import (
+    PubDependency, PubHostedDependency, PubExternalHostedDependency,
+    PubGitDependency, PubPathDependency, PubSdkDependency, DependencyDict, VersionConstraint,
+    as_version_set, parse_version_constraint, version_constraint_in_str
+)
+from .pubspec import Pubspec, PubspecScreenshot
+
+OriginalDocument = Optional[Union[str, Mapping[str, Any]]]
+
+PUBSPEC_FIELDS: tuple[str, ...] = (
+    "name", "version", "description", "homepage", "repository", "issue_tracker",
+    "documentation", "publish_to", "author", "authors", "funding", "topics",
+    "screenshots", "environment", "dependencies", "dev_dependencies",
+    "dependency_overrides", "flutter"
+)
+"""Canonical order of top level fields when writing pubspec"""
+
+DEPENDENCY_SECTIONS: tuple[str, ...] = ("dependencies", "dev_dependencies", "dependency_overrides")
+
+class _MappingNode:
+    __slots__ = ("items",)
+
+    def __init__(self, items: Iterable[tuple[str, Any]]):
+        self.items = items
+
+class _SequenceNode:
+    __slots__ = ("items",)
+
+    def __init__(self, items: Iterable[Any]):
+        self.items = items
+
+_EMPTY = object()
+
+def _peek(items: Iterable[Any]) -> Optional[Iterator[Any]]:
+    it = iter(items)
+    first = next(it, _EMPTY)
+    return None if first is _EMPTY else itertools.chain((first,), it)
+
+# Key ordering
+# ------------
+
+def _original_key_order(original: OriginalDocument) -> tuple[list[str], dict[str, list[str]]]:
+    """
+    Get top level keys and their direct children keys from original document in source order
+    """
+    if original is None:
+        return [], {}
+
+    if isinstance(original, Mapping):
+        return list(original), {k: list(v) for k, v in original.items() if isinstance(v, Mapping)}
+
+    top_keys: list[str] = []
+    child_keys: dict[str, list[str]] = {}
+    current: Optional[str] = None
+    child_indent: Optional[int] = None
+
+    for line in _scan_key_lines(original):
+        if line.indent == 0:
+            current = line.key
+            child_indent = None
+            top_keys.append(current)
+        elif current is not None:
+            if child_indent is None:
+                child_indent = line.indent
+            if line.indent == child_indent:
+                child_keys.setdefault(current, []).append(line.key)
+
+    return top_keys, child_keys
+
+def _ordered(keys: Iterable[str], preferred: Iterable[str]) -> Iterator[str]:
+    """
+    Yield `keys` which appeared in `preferred` first in `preferred` order, then the rest in given order
+    """
+    keys = list(keys)
+    available = set(keys)
+    emitted = set()
+    for k in preferred:
+        if k in available and k not in emitted:
+            emitted.add(k)
+            yield k
+
+    for k in keys:
+        if k not in emitted:
+            yield k
+
+# Node conversion
+# ---------------
+
+def _dependency_node(dependency: PubDependency) -> Any:
+    match dependency:
+        case PubExternalHostedDependency():
+            hosted = dependency.hosted if not dependency.name else _MappingNode((
+                ("name", dependency.name),
+                ("url", dependency.hosted)
+            ))
+            return _MappingNode((("hosted", hosted), ("version", version_constraint_in_str(dependency.version))))
+        case PubHostedDependency():
+            return version_constraint_in_str(dependency.version)
+        case PubGitDependency():
+            if not dependency.path and not dependency.ref:
+                return _MappingNode((("git", dependency.url),))
+            git_context = (("url", dependency.url), ("path", dependency.path), ("ref", dependency.ref))
+            return _MappingNode((("git", _MappingNode((k, v) for k, v in git_context if v)),))
+        case PubPathDependency():
+            return _MappingNode((("path", dependency.path),))
+        case PubSdkDependency():
+            sdk_context = (("sdk", dependency.sdk), ("version", version_constraint_in_str(dependency.version) if dependency.version else None))
+            return _MappingNode((k, v) for k, v in sdk_context if v)
+        case _:
+            return _node(dependency.generate_dict_value())
+
+def _dependencies_node(dependencies: DependencyDict, order: Iterable[str]) -> _MappingNode:
+    return _MappingNode((k, _dependency_node(dependencies[k])) for k in _ordered(dependencies, order))
+
+def _node(value: Any) -> Any:
+    match value:
+        case None | bool() | int() | float() | str():
+            return value
+        case PubDependency():
+            return _dependency_node(value)
+        case PubspecScreenshot():
+            return _MappingNode((("description", value.description), ("path", value.path)))
+        case Mapping():
+            return _MappingNode((str(k), _node(v)) for k, v in value.items())
+        case list() | tuple():
+            return _SequenceNode(_node(i) for i in value)
+        case _:
+            return str(value)
+
+def _pubspec_node(pubspec: Pubspec, original: OriginalDocument) -> _MappingNode:
+    top_order, child_order = _original_key_order(original)
+
+    def items() -> Iterator[tuple[str, Any]]:
+        for field in _ordered(PUBSPEC_FIELDS, top_order):
+            value = getattr(pubspec, field)
+            if value is None:
+                continue
+
+            if field in DEPENDENCY_SECTIONS:
+                yield field, _dependencies_node(value, child_order.get(field, ()))
+            elif field == "version":
+                yield field, str(value)
+            elif field == "environment":
+                yield field, _MappingNode((k, version_constraint_in_str(value[k])) for k in _ordered(value, child_order.get(field, ())))
+            else:
+                yield field, _node(value)
+
+    return _MappingNode(items())
+
+# YAML emitter
+# ------------
+
+_YAML_PLAIN = re.compile(r"[A-Za-z0-9_.^<=~+/$()][A-Za-z0-9_.^<=>~+/$() :@,-]*")
+# Includes YAML 1.1 forms, e.g. `0b101` and sexagesimal `12:30`
+_YAML_NUMBER = re.compile(r"[-+]?(\.inf|\.Inf|\.INF|\.nan|\.NaN|\.NAN|0x[0-9a-fA-F_]+|0o[0-7_]+|0b[01_]+"
+                          r"|\d[\d_]*(:[0-5]?\d)+(\.[\d_]*)?|(\d[\d_]*)?(\.[\d_]*)?([eE][-+]?\d+)?)")
+_YAML_TIMESTAMP = re.compile(r"\d{4}-\d\d?-\d\d?([Tt ].*)?")
+_YAML_RESERVED = frozenset(("null", "Null", "NULL", "~", "true", "True", "TRUE", "false", "False", "FALSE",
+                            "yes", "Yes", "YES", "no", "No", "NO", "on", "On", "ON", "off", "Off", "OFF", "y", "Y", "n", "N",
+                            "=", "<<"))
+
+def _yaml_scalar(value: Any) -> str:
+    match value:
+        case None:
+            return "null"
+        case bool():
+            return "true" if value else "false"
+        case int() | float():
+            return json.dumps(value)
+        case str() if value and _YAML_PLAIN.fullmatch(value) and not (
+                value.endswith((" ", ":")) or ": " in value
+                or value in _YAML_RESERVED or _YAML_NUMBER.fullmatch(value)
+                or _YAML_TIMESTAMP.fullmatch(value)):
+            return value
+        case _:
+            # JSON string is also a valid YAML double-quoted scalar
+            return json.dumps(str(value), ensure_ascii=False)
+
+def _write_yaml_mapping(stream: TextIO, items: Iterable[tuple[str, Any]], indent: int, first_prefix: str):
+    prefix = first_prefix
+    for (key, value) in items:
+        stream.write(prefix)
+        stream.write(_yaml_scalar(key))
+        stream.write(":")
+        _write_yaml_value(stream, value, indent)
+        prefix = " " * indent
+
+def _write_yaml_sequence(stream: TextIO, items: Iterable[Any], indent: int):
+    prefix = " " * indent
+    for item in items:
+        stream.write(prefix)
+        stream.write("-")
+        if isinstance(item, _MappingNode):
+            mapping_items = _peek(item.items)
+            if mapping_items:
+                _write_yaml_mapping(stream, mapping_items, indent + 2, " ")
+                continue
+        _write_yaml_value(stream, item, indent)
+
+def _write_yaml_value(stream: TextIO, value: Any, indent: int):
+    match value:
+        case _MappingNode():
+            items = _peek(value.items)
+            if not items:
+                stream.write(" {}\n")
+            else:
+                stream.write("\n")
+                _write_yaml_mapping(stream, items, indent + 2, " " * (indent + 2))
+        case _SequenceNode():
+            items = _peek(value.items)
+            if not items:
+                stream.write(" []\n")
+            else:
+                stream.write("\n")
+                _write_yaml_sequence(stream, items, indent + 2)
+        case _:
+            stream.write(" ")
+            stream.write(_yaml_scalar(value))
+            stream.write("\n")
+
+def write_pubspec_yaml(pubspec: Pubspec, stream: TextIO, original: OriginalDocument = None) -> None:
+    """
+    Write pubspec as canonical YAML into a text stream
+
+    :param pubspec: Pubspec to write
+    :param stream: Text stream which YAML written into
+    :param original: Original `pubspec.yaml` content or parsed dictionary, uses for preserving fields order
+    """
+    _write_yaml_mapping(stream, _pubspec_node(pubspec, original).items, 0, "")
+
+def dump_pubspec_yaml(pubspec: Pubspec, original: OriginalDocument = None) -> str:
+    """
+    Render pubspec as canonical YAML
+
+    :param pubspec: Pubspec to render
+    :param original: Original `pubspec.yaml` content or parsed dictionary, uses for preserving fields order
+
+    :return: YAML content
+    """
+    buffer = io.StringIO()
+    write_pubspec_yaml(pubspec, buffer, original)
+    return buffer.getvalue()
+
+# JSON emitter
+# ------------
+
+def _write_json_value(stream: TextIO, value: Any, indent: Optional[int], level: int):
+    match value:
+        case _MappingNode():
+            pairs = ((json.dumps(k, ensure_ascii=False) + (": " if indent is not None else ":"), v) for k, v in value.items)
+            _write_json_container(stream, pairs, "{", "}", indent, level)
+        case _SequenceNode():
+            _write_json_container(stream, (("", v) for v in value.items), "[", "]", indent, level)
+        case _:
+            stream.write(json.dumps(value, ensure_ascii=False))
+
+def _write_json_container(stream: TextIO, entries: Iterable[tuple[str, Any]], opening: str, closing: str, indent: Optional[int], level: int):
+    stream.write(opening)
+    separator = "," if indent is None else ",\n" + " " * (indent * (level + 1))
+    first = True
+    for (label, value) in entries:
+        if first:
+            if indent is not None:
+                stream.write("\n" + " " * (indent * (level + 1)))
+            first = False
+        else:
+            stream.write(separator)
+        stream.write(label)
+        _write_json_value(stream, value, indent, level + 1)
+
+    if not first and indent is not None:
+        stream.write("\n" + " " * (indent * level))
+    stream.write(closing)
+
+def write_pubspec_json(pubspec: Pubspec, stream: TextIO, original: OriginalDocument = None, indent: Optional[int] = 2) -> None:
+    """
+    Write pubspec as canonical JSON into a text stream
+
+    :param pubspec: Pubspec to write
+    :param stream: Text stream which JSON written into
+    :param original: Original `pubspec.yaml` content or parsed dictionary, uses for preserving fields order
+    :param indent: Spaces of indentation, or `None` for compact output
+    """
+    _write_json_value(stream, _pubspec_node(pubspec, original), indent, 0)
+
+def dump_pubspec_json(pubspec: Pubspec, original: OriginalDocument = None, indent: Optional[int] = 2) -> str:
+    """
+    Render pubspec as canonical JSON
+
+    :param pubspec: Pubspec to render
+    :param original: Original `pubspec.yaml` content or parsed dictionary, uses for preserving fields order
+    :param indent: Spaces of indentation, or `None` for compact output
+
+    :return: JSON content
+    """
+    buffer = io.StringIO()
+    write_pubspec_json(pubspec, buffer, original, indent)
+    return buffer.getvalue()
+
+# Text patches
+# ------------
+
+class PubspecTextPatch:
+    """
+    Replacement of a span in original `pubspec.yaml` content
+    """
+    def __init__(self, start: int, end: int, replacement: str) -> None:
+        """
+        Create a text patch
+
+        :param start: Offset of first replaced character
+        :param end: Offset after the last replaced character
+        :param replacement: Text replaces the span
+        """
+        self.__start = start
+        self.__end = end
+        self.__replacement = replacement
+
+    @property
+    def start(self) -> int:
+        """
+        Offset of first replaced character
+        """
+        return self.__start
+
+    @property
+    def end(self) -> int:
+        """
+        Offset after the last replaced character
+        """
+        return self.__end
+
+    @property
+    def replacement(self) -> str:
+        """
+        Text replaces the span
+        """
+        return self.__replacement
+
+    def __repr__(self) -> str:
+        return "PubspecTextPatch({}, {}, {!r})".format(self.__start, self.__end, self.__replacement)
+
+class _KeyLine:
+    __slots__ = ("indent", "key", "line_end", "value_start", "value_end")
+
+    def __init__(self, indent: int, key: str, line_end: int, value_start: int, value_end: int):
+        self.indent = indent
+        self.key = key
+        self.line_end = line_end
+        self.value_start = value_start
+        self.value_end = value_end
+
+_KEY_LINE = re.compile(r"( *)(?:\"([^\"]+)\"|'([^']+)'|([^\s\"'#:\-][^:#]*?))[ \t]*:(?=[ \t]|$)")
+_SOURCE_LINE = re.compile(r"[^\n]*\n|[^\n]+")
+
+def _flow_depth_change(text: str) -> int:
+    depth = 0
+    quote: Optional[str] = None
+    for c in text:
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c in "{[":
+            depth += 1
+        elif c in "}]":
+            depth -= 1
+        elif c == "#":
+            break
+
+    return depth
+
+def _scan_key_lines(source: str) -> Iterator[_KeyLine]:
+    """
+    Yield block mapping keys in source with offsets of their inline scalar value
+
+    Contents of block scalars and multi-line flow collections are skipped.
+    """
+    offset = 0
+    block_indent: Optional[int] = None
+    flow_depth = 0
+    for raw in _SOURCE_LINE.findall(source):
+        line_start = offset
+        offset += len(raw)
+        line = raw.rstrip("\r\n")
+        stripped = line.lstrip(" ")
+
+        if flow_depth > 0:
+            flow_depth += _flow_depth_change(stripped)
+            continue
+
+        if block_indent is not None:
+            if not stripped or len(line) - len(stripped) > block_indent:
+                continue
+            block_indent = None
+
+        m = _KEY_LINE.match(line)
+        if not m:
+            continue
+
+        key = m.group(2) or m.group(3) or m.group(4)
+        pos = m.end()
+        while pos < len(line) and line[pos] in " \t":
+            pos += 1
+
+        end = pos
+        if pos < len(line) and line[pos] in "\"'":
+            quote = line[pos]
+            end = pos + 1
+            while end < len(line):
+                if quote == "\"" and line[end] == "\\":
+                    end += 2
+                    continue
+                if line[end] == quote:
+                    if quote == "'" and line[end + 1:end + 2] == "'":
+                        end += 2
+                        continue
+                    end += 1
+                    break
+                end += 1
+        else:
+            comment = line.find(" #", pos - 1)
+            end = len(line) if comment < 0 else comment
+            end = pos + len(line[pos:end].rstrip())
+
+        indicator = line[pos:pos + 1]
+        if indicator in ("|", ">"):
+            block_indent = len(m.group(1))
+        elif indicator in ("{", "["):
+            flow_depth = max(0, _flow_depth_change(line[pos:]))
+
+        yield _KeyLine(len(m.group(1)), key, line_start + len(line), line_start + pos, line_start + end)
+
+def _yaml_unquote(raw: str) -> str:
+    if raw.startswith("\"") and raw.endswith("\"") and len(raw) >= 2:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return raw[1:-1]
+    if raw.startswith("'") and raw.endswith("'") and len(raw) >= 2:
+        return raw[1:-1].replace("''", "'")
+    return raw
+
+def _section_entries(lines: list[_KeyLine], section: str) -> dict[str, tuple[_KeyLine, list[_KeyLine]]]:
+    """
+    Find direct children of top level `section` with lines of their nested block
+    """
+    entries: dict[str, tuple[_KeyLine, list[_KeyLine]]] = {}
+    in_section = False
+    child_indent: Optional[int] = None
+    current: Optional[str] = None
+
+    for line in lines:
+        if line.indent == 0:
+            if in_section:
+                break
+            in_section = line.key == section
+            continue
+
+        if not in_section:
+            continue
+
+        if child_indent is None:
+            child_indent = line.indent
+
+        if line.indent == child_indent:
+            current = line.key
+            entries[current] = (line, [])
+        elif line.indent > child_indent and current is not None:
+            entries[current][1].append(line)
+
+    return entries
+
+def _newline_at(source: str, offset: int) -> str:
+    """
+    Get newline sequence used at `offset`, or the first one in source if `offset` is at the end
+    """
+    if source.startswith("\r\n", offset):
+        return "\r\n"
+    if source.startswith("\n", offset):
+        return "\n"
+    return "\r\n" if "\r\n" in source else "\n"
+
+def _is_inline_scalar(source: str, line: _KeyLine) -> bool:
+    return source[line.value_start:line.value_start + 1] not in ("|", ">", "{", "[")
+
+def _constraint_patch(source: str, line: _KeyLine, constraint: VersionConstraint) -> Optional[PubspecTextPatch]:
+    raw = source[line.value_start:line.value_end]
+    try:
+        if parse_version_constraint(_yaml_unquote(raw)) == as_version_set(constraint):
+            return None
+    except ValueError:
+        # Unparsable constraint in source is always replaced
+        pass
+
+    constraint_str = version_constraint_in_str(constraint)
+
+    # Keep quoting style of original document
+    if raw.startswith("'"):
+        replacement = "'" + constraint_str.replace("'", "''") + "'"
+    elif raw.startswith("\""):
+        replacement = json.dumps(constraint_str, ensure_ascii=False)
+    else:
+        replacement = _yaml_scalar(constraint_str)
+
+    if not raw:
+        if source[line.value_start - 1] not in " \t":
+            replacement = " " + replacement
+        if line.value_start < line.line_end:
+            # Followed by comment, which requires whitespace before `#`
+            replacement += " "
+    return PubspecTextPatch(line.value_start, line.value_end, replacement)
+
+def _dependency_kinds(dependency: PubDependency) -> Optional[tuple[str, ...]]:
+    """
+    Accepted first keys of dependency map in source for given dependency, `None` if unknown
+    """
+    match dependency:
+        case PubHostedDependency():
+            return ("hosted", "version")
+        case PubSdkDependency():
+            return ("sdk",)
+        case PubGitDependency():
+            return ("git",)
+        case PubPathDependency():
+            return ("path",)
+        case _:
+            return None
+
+def _dependency_patch(source: str, header: _KeyLine, children: list[_KeyLine], dependency: PubDependency) -> tuple[bool, Optional[PubspecTextPatch]]:
+    """
+    Create patch of a dependency entry
+
+    :return: Whether the entry can be patched and the patch if constraint changed
+    """
+    if not children:
+        # Scalar or empty value is a hosted dependency in pub.dev
+        if type(dependency) is not PubHostedDependency or not _is_inline_scalar(source, header):
+            return False, None
+        return True, _constraint_patch(source, header, dependency.version)
+
+    kinds = _dependency_kinds(dependency)
+    child_indent = children[0].indent
+    if not kinds or children[0].key not in kinds:
+        return False, None
+
+    if not isinstance(dependency, (PubHostedDependency, PubSdkDependency)):
+        # Git and path dependencies do not have constraint
+        return True, None
+
+    version_line = next((c for c in children if c.indent == child_indent and c.key == "version"), None)
+    if version_line:
+        if not _is_inline_scalar(source, version_line):
+            return False, None
+        if isinstance(dependency, PubSdkDependency) and not dependency.version:
+            # Removing constraint is not a minimal change
+            return False, None
+        return True, _constraint_patch(source, version_line, dependency.version)
+
+    if not dependency.version:
+        return True, None
+
+    last_line_end = max(c.line_end for c in children)
+    return True, PubspecTextPatch(
+        last_line_end, last_line_end,
+        _newline_at(source, last_line_end) + " " * child_indent + "version: " + _yaml_scalar(version_constraint_in_str(dependency.version))
+    )
+
+class PubspecConstraintDiff:
+    """
+    Result of comparing version constraints between `pubspec.yaml` content and pubspec
+    """
+    def __init__(self, patches: list[PubspecTextPatch], skipped: list[str]) -> None:
+        """
+        Create constraints comparison result
+
+        :param patches: Patches of changed constraints
+        :param skipped: Entries which can not be verified or patched
+        """
+        self.__patches = tuple(sorted(patches, key=lambda p: p.start))
+        self.__skipped = tuple(skipped)
+
+    @property
+    def patches(self) -> Sequence[PubspecTextPatch]:
+        """
+        Patches of changed constraints sorted by offset
+        """
+        return self.__patches
+
+    @property
+    def skipped(self) -> Sequence[str]:
+        """
+        Entries in `<section>.<name>` form (e.g. `dependencies.http`) which can not be
+        verified or patched, render whole pubspec by `dump_pubspec_yaml` if it is not empty
+        """
+        return self.__skipped
+
+    def apply(self, source: str) -> str:
+        """
+        Apply patches into source content
+
+        :param source: Original content which used for comparison
+
+        :return: Patched content
+        """
+        return apply_text_patches(source, self.__patches)
+
+def diff_pubspec_constraints(source: str, pubspec: Pubspec) -> PubspecConstraintDiff:
+    """
+    Compare version constraints in original `pubspec.yaml` content with given pubspec,
+    and create patches which only replace changed constraints.
+
+    Only environment and dependencies written in block style with inline scalar
+    constraints are patched. Entries which cannot be patched, including added or removed
+    entries and dependencies which changed kind (e.g. from path to hosted), are
+    reported in `PubspecConstraintDiff.skipped`.
+
+    :param source: Original `pubspec.yaml` content
+    :param pubspec: Pubspec with updated constraints
+
+    :return: Patches and skipped entries
+    """
+    lines = list(_scan_key_lines(source))
+    patches: list[PubspecTextPatch] = []
+    skipped: list[str] = []
+
+    environment = pubspec.environment or {}
+    entries = _section_entries(lines, "environment")
+    for (name, constraint) in environment.items():
+        entry = entries.get(name)
+        if not entry or entry[1] or not _is_inline_scalar(source, entry[0]):
+            skipped.append("environment." + name)
+            continue
+
+        patch = _constraint_patch(source, entry[0], constraint)
+        if patch:
+            patches.append(patch)
+    skipped.extend("environment." + name for name in entries if name not in environment)
+
+    for section in DEPENDENCY_SECTIONS:
+        dependencies: DependencyDict = getattr(pubspec, section) or {}
+        entries = _section_entries(lines, section)
+        for (name, dependency) in dependencies.items():
+            entry = entries.get(name)
+            (patchable, patch) = _dependency_patch(source, *entry, dependency) if entry else (False, None)
+            if not patchable:
+                skipped.append(section + "." + name)
+            elif patch:
+                patches.append(patch)
+        skipped.extend(section + "." + name for name in entries if name not in dependencies)
+
+    return PubspecConstraintDiff(patches, skipped)
+
+def apply_text_patches(source: str, patches: Iterable[PubspecTextPatch]) -> str:
+    """
+    Apply non-overlapping patches into source content
+
+    :param source: Original content
+    :param patches: Patches to apply
+
+    :return: Patched content
+    """
+    chunks: list[str] = []
+    cursor = 0
+    for patch in sorted(patches, key=lambda p: p.start):
+        if patch.start < cursor:
+            raise ValueError("Overlapped patches found")
+        chunks.append(source[cursor:patch.start])
+        chunks.append(patch.replacement)
+        cursor = patch.end
+
+    chunks.append(source[cursor:])
+    return "".join(chunks)
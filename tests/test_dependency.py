@@ -0,0 +1,39 @@
+import pytest
+from versions import parse_version, parse_version_set
+
+from pydartpub.structures.dependency import (
+    PubHostedDependency, PubSdkDependency, as_version_set, parse_version_constraint, version_constraint_in_str
+)
+
+
+@pytest.mark.parametrize(("constraint", "expected"), [
+    (None, "any"),
+    (parse_version_set("*"), "any"),
+    (parse_version("1.2.3"), "1.2.3"),
+    (parse_version_set("1.2.3"), "1.2.3"),
+    (parse_version_set("^1.2.0"), "^1.2.0"),
+    (parse_version_set("^0.2.1"), "^0.2.1"),
+    (parse_version_set("^0.0.3"), "^0.0.3"),
+    (parse_version_set(">=1.0.0, <1.5.0"), ">=1.0.0 <1.5.0"),
+    (parse_version_set(">1.0.0, <=2.0.0"), ">1.0.0 <=2.0.0"),
+    (parse_version_set(">=1.0.0"), ">=1.0.0")
+])
+def test_version_constraint_in_str(constraint, expected):
+    assert version_constraint_in_str(constraint) == expected
+    assert parse_version_constraint(expected) == as_version_set(constraint)
+
+
+def test_version_constraint_in_str_rejects_union():
+    with pytest.raises(ValueError):
+        version_constraint_in_str(parse_version_set("^1.0.0 || ^3.0.0"))
+
+
+@pytest.mark.parametrize("constraint", [">=1.2.0 <2.0.0", ">= 1.2.0 < 2.0.0", " ^1.2.0 "])
+def test_parse_version_constraint(constraint):
+    assert parse_version_constraint(constraint) == parse_version_set("^1.2.0")
+
+
+def test_generate_dict_value_in_pub_syntax():
+    assert PubHostedDependency(parse_version_set("^1.2.0")).generate_dict_value() == "^1.2.0"
+    assert PubHostedDependency(None).generate_dict_value() == "any"
+    assert PubSdkDependency("flutter", parse_version_set(">=3.0.0, <3.5.0")).generate_dict_value() == {"sdk": "flutter", "version": ">=3.0.0 <3.5.0"}
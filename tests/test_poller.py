@@ -0,0 +1,258 @@
+import threading
+
+import pytest
+from versions import parse_version
+
+from pydartpub.api.cmd.factory import ResponseError
+from pydartpub.api.poller import DocumentationNotFoundError, DocumentationPoller, PollBudgetExhaustedError
+from pydartpub.api.result.documentations import DocumentStatus, parse_documentation
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+class FakeDocumentationClient:
+    """
+    Return queued responses (or raise queued exceptions) per package
+    """
+    def __init__(self, responses: dict[str, list]):
+        self.responses = responses
+        self.calls: list[str] = []
+
+    def execute(self, package_name: str):
+        self.calls.append(package_name)
+        queue = self.responses[package_name]
+        resp = queue.pop(0) if len(queue) > 1 else queue[0]
+        if isinstance(resp, BaseException):
+            raise resp
+        return resp
+
+
+def doc_json(name: str, **statuses: str) -> dict:
+    return {
+        "name": name,
+        "latestStableVersion": "1.0.0",
+        "versions": [
+            {"version": v.replace("_", "."), "status": s, "hasDocumentation": s == "completed"}
+            for v, s in statuses.items()
+        ]
+    }
+
+
+def make_poller(client, **kwargs):
+    clock = FakeClock()
+    return DocumentationPoller(client, clock=clock, sleep=clock.sleep, **kwargs), clock
+
+
+def test_parse_documentation():
+    doc = parse_documentation({
+        "name": "foo",
+        "latestStableVersion": "1.1.0",
+        "versions": [
+            {"version": "1.0.0", "status": "completed", "hasDocumentation": True},
+            {"version": "1.1.0", "status": "pending", "hasDocumentation": True},
+            {"version": "1.2.0-dev", "status": "failed", "hasDocumentation": False}
+        ]
+    })
+
+    assert doc.name == "foo"
+    assert str(doc.latest_stable_version) == "1.1.0"
+    assert [d.status for d in doc.versions] == [DocumentStatus.SUCCESS, DocumentStatus.PENDING, DocumentStatus.FAILED]
+    assert [d.has_documentation for d in doc.versions] == [True, False, False]
+
+
+def test_versions_of_same_package_coalesced():
+    client = FakeDocumentationClient({"foo": [doc_json("foo", **{"1_0_0": "completed", "1_1_0": "failed"})]})
+    poller, _ = make_poller(client)
+    called = []
+
+    f1 = poller.track("foo", "1.0.0", called.append)
+    f2 = poller.track("foo", parse_version("1.1.0"))
+    assert poller.track("foo", "1.0.0") is f1
+
+    poller.run()
+
+    assert client.calls == ["foo"]
+    assert f1.result().status == DocumentStatus.SUCCESS
+    assert f2.result().status == DocumentStatus.FAILED
+    assert called == [f1.result()]
+    assert poller.pending_count == 0
+
+
+def test_backoff_until_finished():
+    pending = doc_json("foo", **{"1_0_0": "pending"})
+    client = FakeDocumentationClient({"foo": [pending, pending, pending, doc_json("foo", **{"1_0_0": "completed"})]})
+    poller, clock = make_poller(client, initial_interval=1.0, max_interval=3.0, backoff_factor=2.0)
+    poll_times = []
+    client_execute = client.execute
+    client.execute = lambda name: poll_times.append(clock.now) or client_execute(name)
+
+    future = poller.track("foo", "1.0.0")
+    poller.run()
+
+    assert future.result().status == DocumentStatus.SUCCESS
+    # 1s before first poll, then 2s, 3s (capped), 3s
+    assert poll_times == [1.0, 3.0, 6.0, 9.0]
+
+
+def test_poll_once_skips_packages_not_due():
+    client = FakeDocumentationClient({"foo": [doc_json("foo", **{"1_0_0": "pending"})]})
+    poller, clock = make_poller(client, initial_interval=5.0)
+    poller.track("foo", "1.0.0")
+
+    assert poller.poll_once() == 0
+    clock.now = 5.0
+    assert poller.poll_once() == 1
+    assert poller.poll_once() == 0
+    assert poller.next_poll_time() == 15.0
+
+
+def test_budget_exhausted():
+    client = FakeDocumentationClient({"foo": [doc_json("foo", **{"1_0_0": "pending"})]})
+    poller, _ = make_poller(client, request_budget=3, initial_interval=1.0)
+    future = poller.track("foo", "1.0.0")
+
+    poller.run()
+
+    assert len(client.calls) == 3
+    assert poller.remaining_budget == 0
+    assert isinstance(future.exception(), PollBudgetExhaustedError)
+    assert future.exception().package_name == "foo"
+
+
+@pytest.mark.parametrize("error", [ResponseError(404), ConnectionResetError(), TimeoutError()])
+def test_transient_errors_backoff(error):
+    client = FakeDocumentationClient({"foo": [error, doc_json("foo", **{"1_0_0": "completed"})]})
+    poller, _ = make_poller(client, initial_interval=1.0)
+    future = poller.track("foo", "1.0.0")
+
+    poller.run()
+
+    assert len(client.calls) == 2
+    assert future.result().status == DocumentStatus.SUCCESS
+
+
+def test_malformed_response_fails_package_futures():
+    client = FakeDocumentationClient({
+        "foo": [{"unexpected": True}],
+        "bar": [doc_json("bar", **{"1_0_0": "completed"})]
+    })
+    poller, _ = make_poller(client, initial_interval=1.0)
+    foo_future = poller.track("foo", "1.0.0")
+    bar_future = poller.track("bar", "1.0.0")
+
+    poller.run()
+
+    assert isinstance(foo_future.exception(), KeyError)
+    assert bar_future.result().status == DocumentStatus.SUCCESS
+
+
+def test_callback_error_does_not_block_other_versions():
+    client = FakeDocumentationClient({"foo": [doc_json("foo", **{"1_0_0": "completed", "1_1_0": "completed"})]})
+    poller, _ = make_poller(client)
+    called = []
+
+    def broken_callback(_):
+        raise RuntimeError()
+
+    f1 = poller.track("foo", "1.0.0", broken_callback)
+    f2 = poller.track("foo", "1.1.0", called.append)
+
+    poller.run()
+
+    assert f1.done() and f2.done()
+    assert called == [f2.result()]
+    assert poller.pending_count == 0
+
+
+def test_zero_initial_interval_rejected():
+    with pytest.raises(ValueError):
+        DocumentationPoller(FakeDocumentationClient({}), initial_interval=0)
+
+
+def test_rate_limit_spreads_requests():
+    packages = ["pkg{}".format(i) for i in range(30)]
+    client = FakeDocumentationClient({p: [doc_json(p, **{"1_0_0": "completed"})] for p in packages})
+    poller, clock = make_poller(client, initial_interval=5.0, rate_limit=10.0, rate_burst=5)
+    poll_times = []
+    client_execute = client.execute
+    client.execute = lambda name: poll_times.append(clock.now) or client_execute(name)
+
+    futures = [poller.track(p, "1.0.0") for p in packages]
+    poller.run()
+
+    assert all(f.result().status == DocumentStatus.SUCCESS for f in futures)
+    assert poll_times[:5] == [5.0] * 5
+    assert max(poll_times.count(t) for t in set(poll_times)) <= 5
+    # Remaining 25 requests at 10 requests per second
+    assert poll_times[-1] == pytest.approx(7.5)
+
+
+@pytest.mark.parametrize("response", [ResponseError(404), doc_json("foo", **{"2_0_0": "completed"})])
+def test_missing_version_gives_up(response):
+    client = FakeDocumentationClient({"foo": [response]})
+    poller, _ = make_poller(client, initial_interval=1.0, max_missing_polls=3)
+    future = poller.track("foo", "1.0.0")
+
+    poller.run()
+
+    assert len(client.calls) == 3
+    assert isinstance(future.exception(), DocumentationNotFoundError)
+
+
+def test_missing_polls_reset_once_version_visible():
+    missing = doc_json("foo")
+    pending = doc_json("foo", **{"1_0_0": "pending"})
+    client = FakeDocumentationClient({"foo": [missing, pending, missing, doc_json("foo", **{"1_0_0": "completed"})]})
+    poller, _ = make_poller(client, initial_interval=1.0, max_missing_polls=2)
+    future = poller.track("foo", "1.0.0")
+
+    poller.run()
+
+    assert future.result().status == DocumentStatus.SUCCESS
+    assert len(client.calls) == 4
+
+
+def test_track_again_after_cancel():
+    client = FakeDocumentationClient({"foo": [doc_json("foo", **{"1_0_0": "completed"})]})
+    poller, _ = make_poller(client)
+
+    cancelled = poller.track("foo", "1.0.0")
+    assert cancelled.cancel()
+    future = poller.track("foo", "1.0.0")
+
+    poller.run()
+
+    assert future is not cancelled
+    assert future.result().status == DocumentStatus.SUCCESS
+
+
+def test_track_from_other_thread_while_running():
+    release = threading.Event()
+    packages = ["pkg{}".format(i) for i in range(200)]
+
+    class Client:
+        def execute(self, package_name: str):
+            status = "completed" if package_name != "hold" or release.is_set() else "pending"
+            return doc_json(package_name, **{"1_0_0": status})
+
+    poller = DocumentationPoller(Client(), initial_interval=0.001, max_interval=0.01, rate_limit=None)
+    hold = poller.track("hold", "1.0.0")
+    runner = threading.Thread(target=poller.run)
+    runner.start()
+
+    futures = [poller.track(p, "1.0.0") for p in packages]
+    release.set()
+    runner.join(timeout=10)
+
+    assert not runner.is_alive()
+    assert hold.result(timeout=0).status == DocumentStatus.SUCCESS
+    assert all(f.result(timeout=0).status == DocumentStatus.SUCCESS for f in futures)
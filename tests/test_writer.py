@@ -0,0 +1,310 @@
+import io
+import json
+
+import pytest
+from versions import parse_version, parse_version_set
+
+from pydartpub.structures.dependency import (
+    PubHostedDependency, PubExternalHostedDependency, PubGitDependency, PubPathDependency, PubSdkDependency
+)
+from pydartpub.structures.pubspec import Pubspec, PubspecScreenshot
+from pydartpub.structures.writer import (
+    PubspecTextPatch, apply_text_patches, diff_pubspec_constraints,
+    dump_pubspec_json, dump_pubspec_yaml, write_pubspec_json, write_pubspec_yaml
+)
+
+yaml = pytest.importorskip("yaml")
+
+SDK = parse_version_set("^3.0.0")
+HTTP = parse_version_set("^1.2.0")
+NEW = parse_version_set("^2.0.0")
+
+
+def full_pubspec() -> Pubspec:
+    return Pubspec(
+        "foo",
+        version=parse_version("1.0.0"),
+        description="A package: with colon\nand newline",
+        publish_to="none",
+        environment={"sdk": SDK},
+        topics=["dart", "1.0", "true", "12:30", "1:2", "2001-12-14", "0b101"],
+        screenshots=[PubspecScreenshot("Logo", "logo.png")],
+        dependencies={
+            "http": PubHostedDependency(HTTP),
+            "anything": PubHostedDependency(None),
+            "ext": PubExternalHostedDependency(HTTP, "https://pub.example.com"),
+            "ext_named": PubExternalHostedDependency(None, "https://pub.example.com", "other"),
+            "git_short": PubGitDependency("https://example.com/a.git", None, None),
+            "git_full": PubGitDependency("https://example.com/b.git", "pkgs/b", "main"),
+            "local": PubPathDependency("../local"),
+            "flutter": PubSdkDependency("flutter", None),
+            "flutter_versioned": PubSdkDependency("flutter", SDK)
+        },
+        dev_dependencies={"test": PubHostedDependency(HTTP)},
+        flutter={"uses-material-design": True, "assets": ["images/"], "fonts": [{"family": "X", "fonts": [{"asset": "x.ttf", "weight": 700}]}], "empty": {}}
+    )
+
+
+FULL_EXPECTED = {
+    "name": "foo",
+    "version": "1.0.0",
+    "description": "A package: with colon\nand newline",
+    "publish_to": "none",
+    "topics": ["dart", "1.0", "true", "12:30", "1:2", "2001-12-14", "0b101"],
+    "screenshots": [{"description": "Logo", "path": "logo.png"}],
+    "environment": {"sdk": "^3.0.0"},
+    "dependencies": {
+        "http": "^1.2.0",
+        "anything": "any",
+        "ext": {"hosted": "https://pub.example.com", "version": "^1.2.0"},
+        "ext_named": {"hosted": {"name": "other", "url": "https://pub.example.com"}, "version": "any"},
+        "git_short": {"git": "https://example.com/a.git"},
+        "git_full": {"git": {"url": "https://example.com/b.git", "path": "pkgs/b", "ref": "main"}},
+        "local": {"path": "../local"},
+        "flutter": {"sdk": "flutter"},
+        "flutter_versioned": {"sdk": "flutter", "version": "^3.0.0"}
+    },
+    "dev_dependencies": {"test": "^1.2.0"},
+    "flutter": {"uses-material-design": True, "assets": ["images/"], "fonts": [{"family": "X", "fonts": [{"asset": "x.ttf", "weight": 700}]}], "empty": {}}
+}
+
+
+def test_yaml_round_trip():
+    assert yaml.safe_load(dump_pubspec_yaml(full_pubspec())) == FULL_EXPECTED
+
+
+@pytest.mark.parametrize("indent", [2, None])
+def test_json_round_trip(indent):
+    assert json.loads(dump_pubspec_json(full_pubspec(), indent=indent)) == FULL_EXPECTED
+
+
+def test_pub_constraint_syntax():
+    pubspec = Pubspec("foo", environment={"sdk": parse_version_set(">=3.0.0, <3.5.0")}, dependencies={"exact": PubHostedDependency(parse_version("1.0.0"))})
+
+    rendered = dump_pubspec_yaml(pubspec)
+
+    assert "sdk: \">=3.0.0 <3.5.0\"\n" in rendered
+    assert "exact: 1.0.0\n" in rendered
+
+
+def test_write_into_stream():
+    yaml_stream = io.StringIO()
+    json_stream = io.StringIO()
+    write_pubspec_yaml(full_pubspec(), yaml_stream)
+    write_pubspec_json(full_pubspec(), json_stream)
+
+    assert yaml_stream.getvalue() == dump_pubspec_yaml(full_pubspec())
+    assert json_stream.getvalue() == dump_pubspec_json(full_pubspec())
+
+
+def test_canonical_field_order():
+    keys = list(yaml.safe_load(dump_pubspec_yaml(full_pubspec())))
+    assert keys == ["name", "version", "description", "publish_to", "topics", "screenshots", "environment", "dependencies", "dev_dependencies", "flutter"]
+
+
+def test_preserve_original_order_from_text():
+    original = (
+        "dependencies:\n"
+        "  local:\n"
+        "    path: ../local\n"
+        "  http: ^1.2.0\n"
+        "description: >\n"
+        "  name: not a key\n"
+        "\n"
+        "  version: not a key either\n"
+        "name: foo\n"
+    )
+    pubspec = Pubspec("foo", description="d", dependencies={"http": PubHostedDependency(HTTP), "local": PubPathDependency("../local")})
+
+    rendered = yaml.safe_load(dump_pubspec_yaml(pubspec, original))
+    assert list(rendered) == ["dependencies", "description", "name"]
+    assert list(rendered["dependencies"]) == ["local", "http"]
+
+
+def test_preserve_original_order_from_mapping():
+    original = {"environment": {}, "name": "foo", "dependencies": {"b": "any", "a": "any"}}
+    pubspec = Pubspec("foo", environment={"sdk": SDK}, dependencies={"a": PubHostedDependency(None), "b": PubHostedDependency(None)})
+
+    rendered = json.loads(dump_pubspec_json(pubspec, original))
+    assert list(rendered) == ["environment", "name", "dependencies"]
+    assert list(rendered["dependencies"]) == ["b", "a"]
+
+
+def patch(source: str, pubspec: Pubspec) -> str:
+    diff = diff_pubspec_constraints(source, pubspec)
+    assert diff.skipped == ()
+    return diff.apply(source)
+
+
+def test_patch_only_changed_constraint():
+    source = (
+        "name: foo\n"
+        "environment:\n"
+        "  sdk: ^3.0.0\n"
+        "dependencies:\n"
+        "  http: ^1.2.0 # keep me\n"
+        "  path: ^1.0.0\n"
+    )
+    pubspec = Pubspec("foo", environment={"sdk": SDK}, dependencies={"http": PubHostedDependency(NEW), "path": PubHostedDependency(HTTP)})
+
+    diff = diff_pubspec_constraints(source, pubspec)
+
+    assert len(diff.patches) == 2
+    assert diff.skipped == ()
+    assert diff.apply(source) == (
+        "name: foo\n"
+        "environment:\n"
+        "  sdk: ^3.0.0\n"
+        "dependencies:\n"
+        "  http: ^2.0.0 # keep me\n"
+        "  path: ^1.2.0\n"
+    )
+
+
+def test_patch_equivalent_constraint_is_unchanged():
+    source = "name: foo\nenvironment:\n  sdk: '>=3.0.0 <4.0.0'\ndependencies:\n  http: \">= 1.2.0 < 2.0.0\"\n  any_dep:\n  exact: 2.0.0\n"
+    pubspec = Pubspec("foo", environment={"sdk": SDK}, dependencies={
+        "http": PubHostedDependency(HTTP),
+        "any_dep": PubHostedDependency(None),
+        "exact": PubHostedDependency(parse_version("2.0.0"))
+    })
+
+    diff = diff_pubspec_constraints(source, pubspec)
+
+    assert diff.patches == ()
+    assert diff.skipped == ()
+
+
+@pytest.mark.parametrize("line", ["  http:", "  http:   ", "  http: # pin later", "  http:    # pin later"])
+def test_patch_empty_value(line):
+    source = "name: foo\ndependencies:\n" + line + "\n"
+    pubspec = Pubspec("foo", dependencies={"http": PubHostedDependency(NEW)})
+
+    result = patch(source, pubspec)
+
+    assert yaml.safe_load(result)["dependencies"]["http"] == "^2.0.0"
+    if "#" in line:
+        assert result.rstrip("\n").endswith(" # pin later")
+
+
+@pytest.mark.parametrize("quoted", ["'^1.0.0'", "\"^1.0.0\""])
+def test_patch_keep_quote_style(quoted):
+    source = "name: foo\ndependencies:\n  http: " + quoted + "\n"
+    pubspec = Pubspec("foo", dependencies={"http": PubHostedDependency(NEW)})
+
+    result = patch(source, pubspec)
+
+    assert result.splitlines()[2] == "  http: " + quoted[0] + "^2.0.0" + quoted[0]
+
+
+def test_patch_nested_version():
+    source = (
+        "name: foo\n"
+        "dependencies:\n"
+        "  ext:\n"
+        "    hosted: https://pub.example.com\n"
+        "    version: ^1.0.0\n"
+    )
+    pubspec = Pubspec("foo", dependencies={"ext": PubExternalHostedDependency(NEW, "https://pub.example.com")})
+
+    assert yaml.safe_load(patch(source, pubspec))["dependencies"]["ext"] == {"hosted": "https://pub.example.com", "version": "^2.0.0"}
+
+
+def test_patch_insert_version_keeps_crlf():
+    source = "name: foo\r\ndependencies:\r\n  flutter:\r\n    sdk: flutter\r\n  http: any\r\n"
+    pubspec = Pubspec("foo", dependencies={"flutter": PubSdkDependency("flutter", SDK), "http": PubHostedDependency(None)})
+
+    result = patch(source, pubspec)
+
+    assert "\n" not in result.replace("\r\n", "")
+    assert yaml.safe_load(result)["dependencies"]["flutter"] == {"sdk": "flutter", "version": "^3.0.0"}
+
+
+@pytest.mark.parametrize("entry", ["  foo:\n    path: ../foo\n", "  foo:\n    git:\n      url: https://example.com/foo.git\n", "  foo:\n    sdk: flutter\n"])
+def test_patch_skip_dependency_kind_changed(entry):
+    source = "name: foo\ndependencies:\n" + entry
+    pubspec = Pubspec("foo", dependencies={"foo": PubHostedDependency(NEW)})
+
+    diff = diff_pubspec_constraints(source, pubspec)
+
+    assert diff.patches == ()
+    assert diff.skipped == ("dependencies.foo",)
+
+
+def test_patch_same_kind_without_constraint():
+    source = "name: foo\ndependencies:\n  foo:\n    path: ../foo\n  bar:\n    git: https://example.com/bar.git\n"
+    pubspec = Pubspec("foo", dependencies={
+        "foo": PubPathDependency("../foo"),
+        "bar": PubGitDependency("https://example.com/bar.git", None, None)
+    })
+
+    diff = diff_pubspec_constraints(source, pubspec)
+
+    assert diff.patches == ()
+    assert diff.skipped == ()
+
+
+def test_patch_report_added_and_removed_entries():
+    source = "name: foo\nenvironment:\n  sdk: ^3.0.0\ndependencies:\n  a: ^1.0.0\n"
+    pubspec = Pubspec("foo", environment={"flutter": SDK}, dependencies={"b": PubHostedDependency(NEW)}, dev_dependencies={"c": PubHostedDependency(None)})
+
+    diff = diff_pubspec_constraints(source, pubspec)
+
+    assert diff.patches == ()
+    assert sorted(diff.skipped) == ["dependencies.a", "dependencies.b", "dev_dependencies.c", "environment.flutter", "environment.sdk"]
+
+
+def test_patch_skip_block_scalar_content():
+    source = (
+        "name: foo\n"
+        "dependencies:\n"
+        "  folded: >-\n"
+        "    ^1.0.0\n"
+        "  ext:\n"
+        "    hosted: |\n"
+        "      version: ^1.0.0\n"
+        "    version: ^1.0.0\n"
+    )
+    pubspec = Pubspec("foo", dependencies={
+        "folded": PubHostedDependency(NEW),
+        "ext": PubExternalHostedDependency(NEW, "version: ^1.0.0\n")
+    })
+
+    diff = diff_pubspec_constraints(source, pubspec)
+
+    assert len(diff.patches) == 1
+    assert diff.skipped == ("dependencies.folded",)
+    result = yaml.safe_load(diff.apply(source))["dependencies"]
+    assert result["folded"] == "^1.0.0"
+    assert result["ext"] == {"hosted": "version: ^1.0.0\n", "version": "^2.0.0"}
+
+
+def test_patch_skip_flow_style():
+    source = (
+        "name: foo\n"
+        "dependencies:\n"
+        "  http: {hosted: https://pub.example.com, version: ^1.0.0}\n"
+        "  path: {\n"
+        "    hosted: https://pub.example.com,\n"
+        "    version: ^1.0.0\n"
+        "  }\n"
+        "  yaml: ^1.0.0\n"
+    )
+    pubspec = Pubspec("foo", dependencies={
+        "http": PubExternalHostedDependency(NEW, "https://pub.example.com"),
+        "path": PubExternalHostedDependency(NEW, "https://pub.example.com"),
+        "yaml": PubHostedDependency(NEW)
+    })
+
+    diff = diff_pubspec_constraints(source, pubspec)
+
+    assert diff.skipped == ("dependencies.http", "dependencies.path")
+    result = yaml.safe_load(diff.apply(source))["dependencies"]
+    assert result["http"]["version"] == "^1.0.0"
+    assert result["path"]["version"] == "^1.0.0"
+    assert result["yaml"] == "^2.0.0"
+
+
+def test_apply_overlapped_patches():
+    with pytest.raises(ValueError):
+        apply_text_patches("abcdef", [PubspecTextPatch(0, 3, "x"), PubspecTextPatch(2, 4, "y")])